@@ -88,9 +88,10 @@ def run(country, index):
                 gdf,
             )
         )
-        logging.info(
-            f"Completed analytical process for {params.index.upper()} over {country} country"
-        )
+
+    logging.info(
+        f"Completed analytical process for {params.index.upper()} over {country} country"
+    )
 
     fbf_roc = pd.concat(fbf_roc_issues)
     fbf_roc.to_csv(
@@ -372,9 +373,7 @@ def get_verification_df(auc, auc_bc):
     auc_merged_df = auc_df.join(auc_bc_df)
 
     auc_merged_df["AUC_best"] = auc_merged_df.max(axis=1)
-    auc_merged_df["BC"] = [
-        int(row.AUC_best == row.AUC_BC) for i, row in auc_merged_df.iterrows()
-    ]
+    auc_merged_df["BC"] = (auc_merged_df.AUC_best == auc_merged_df.AUC_BC).astype(int)
 
     auc_merged_df = auc_merged_df.drop(["AUC", "AUC_BC"], axis=1)
 
@@ -3,10 +3,10 @@ import glob
 import os
 
 import datetime
-import geopandas as gpd
 import numpy as np
 import pandas as pd
 import xarray as xr
+from rasterio.features import rasterize
 
 from hip.analysis.compute.utils import persist_with_progress_bar
 
@@ -14,6 +14,9 @@ PORTUGUESE_CATEGORIES = dict(
     Normal="Normal", Mild="Leve", Moderate="Moderado", Severe="Severo"
 )
 
+# Zarr cache chunking: full time series per spatial tile, as read by the accumulation
+ZARR_CHUNKS = dict(time=-1, latitude=32, longitude=32)
+
 
 def create_flexible_dataarray(start_season, end_season):
     # Create the start and end dates
@@ -54,21 +57,28 @@ def triggers_da_to_df(triggers_da, hr_da):
 def aggregate_by_district(ds, gdf, params):
     PROJ = "+proj=longlat +ellps=clrk66 +towgs84=-80,-100,-228,0,0,0,0 +no_defs"
 
-    # Clip ds to districts
-    list_districts = {}
-    for _, row in gdf.iterrows():
-        try:
-            list_districts[row["Name"]] = (
-                ds.rio.write_crs(PROJ)
-                .rio.clip(gpd.GeoSeries(row.geometry))
-                .mean(dim=["latitude", "longitude"])
-            )
-        except:
-            continue
+    ds = ds.rio.write_crs(PROJ)
 
-    ds_by_district = xr.concat(
-        list_districts.values(), pd.Index(list_districts.keys(), name="district")
+    # Label each pixel with its district once (pixel centre rule, as rio.clip)
+    codes, names = pd.factorize(gdf["Name"])
+    labels = rasterize(
+        zip(gdf.geometry, codes + 1),
+        out_shape=(ds.rio.height, ds.rio.width),
+        transform=ds.rio.transform(),
+        fill=0,
+        dtype="int32",
+    )
+    labels = xr.DataArray(
+        labels,
+        dims=(ds.rio.y_dim, ds.rio.x_dim),
+        coords={ds.rio.y_dim: ds[ds.rio.y_dim], ds.rio.x_dim: ds[ds.rio.x_dim]},
+        name="district",
     )
+
+    # Average over each district at once (districts without pixels are dropped)
+    ds_by_district = ds.groupby(labels.where(labels > 0)).mean()
+    ds_by_district["district"] = names[ds_by_district.district.values.astype(int) - 1]
+    ds_by_district = ds_by_district.transpose("district", ...)
     ds_by_district["district"] = ds_by_district.district.astype(str)
 
     return ds_by_district
@@ -104,24 +114,22 @@ def format_triggers_df_for_dashboard(triggers, params):
         triggers.loc[triggers.trigger == "trigger2"].issue.values + 1
     )
 
-    triggers["prob"] = np.nan
     triggers["HR"] = triggers["HR"].abs()
     # triggers["season"] = f"{params.monitoring_year}-{str(params.monitoring_year+1)[-2:]}"
     # triggers['date'] = [params.monitoring_year if r.issue >= 5 else params.monitoring_year+1 for _, r in triggers.iterrows()]
     # triggers['date'] = [pd.to_datetime(f"{r.issue}-1-{r.date}") for _, r in triggers.iterrows()]
 
-    def substract(issue):
-        return 2 if issue == 1 else 1
-
-    triggers["mready"] = [
-        r.issue if r.trigger == "trigger1" else (r.issue - substract(int(r.issue))) % 13
-        for _, r in triggers.iterrows()
-    ]
+    # Ready month of each pair: set month minus one (two when set is in January)
+    triggers["mready"] = np.where(
+        triggers.trigger == "trigger1",
+        triggers.issue,
+        (triggers.issue - np.where(triggers.issue == 1, 2, 1)) % 13,
+    )
 
     triggers_pivot = triggers.pivot_table(
         index=["district", "index", "category", "Window", "mready"],
         columns="trigger",
-        values=["trigger_value", "prob", "issue"],
+        values=["trigger_value", "issue"],
     ).reset_index()
     triggers_pivot.columns = [
         "district",
@@ -140,24 +148,18 @@ def format_triggers_df_for_dashboard(triggers, params):
 
 
 def get_coverage(triggers_df, districts: list, columns: list):
-    cov = pd.DataFrame(
-        columns=columns,
-        index=districts,
+    # Count triggers per district / window / category in a single groupby
+    counts = triggers_df.groupby(["district", "window", "category"]).size()
+    windows_categories = pd.MultiIndex.from_product(
+        [triggers_df["window"].unique(), triggers_df["category"].unique()]
+    )
+    cov = (
+        counts.unstack(["window", "category"])
+        .reindex(index=districts, columns=windows_categories)
+        .fillna(0)
+        .astype(int)
     )
-    for d, r in cov.iterrows():
-        val = []
-        for w in triggers_df["window"].unique():
-            for c in triggers_df["category"].unique():
-                val.append(
-                    len(
-                        triggers_df[
-                            (triggers_df["window"] == w)
-                            & (triggers_df["category"] == c)
-                            & (triggers_df["district"] == d)
-                        ]
-                    )
-                )
-        cov.loc[d] = val
+    cov.columns = columns
 
     print(
         f"The coverage is {round(100 * np.sum(cov.values > 0) / np.size(cov.values), 1)} %"
@@ -182,23 +184,16 @@ def merge_probabilities_triggers_dashboard(probs, triggers, params, period):
         triggers_merged["prob_set"] = np.nan
 
     # Fill in probabilities columns matching with triggers
-    for l, row in triggers_merged.iterrows():
-        if (row.issue_ready == params.issue) and (
-            row["index"] == f"{params.index.upper()} {period}"
-        ):
-            triggers_merged.loc[l, "prob_ready"] = probs_df.loc[
-                (probs_df["index"] == row["index"])
-                & (probs_df["category"] == row.category)
-                & (probs_df["district"] == row.district)
-            ].prob.values[0]
-        elif (row.issue_set == params.issue) and (
-            row["index"] == f"{params.index.upper()} {period}"
-        ):
-            triggers_merged.loc[l, "prob_set"] = probs_df.loc[
-                (probs_df["index"] == row["index"])
-                & (probs_df["category"] == row.category)
-                & (probs_df["district"] == row.district)
-            ].prob.values[0]
+    keys = ["index", "category", "district"]
+    probs_keys = probs_df[keys + ["prob"]].drop_duplicates(keys)
+    is_period = triggers_merged["index"] == f"{params.index.upper()} {period}"
+    ready = is_period & (triggers_merged.issue_ready == params.issue)
+    set_ = is_period & (triggers_merged.issue_set == params.issue) & ~ready
+    for mask, col in [(ready, "prob_ready"), (set_, "prob_set")]:
+        matched = triggers_merged.loc[mask, keys].merge(
+            probs_keys, on=keys, how="left"
+        )
+        triggers_merged.loc[mask, col] = matched.prob.values
 
     return probs_df, triggers_merged
 
@@ -235,7 +230,7 @@ def read_forecasts(area, issue, local_path, update=False):
         logging.info("Reading of forecasts from source...")
         forecasts = persist_with_progress_bar(forecasts)
         forecasts.attrs["nodata"] = np.nan
-        forecasts.chunk(dict(time=-1)).to_zarr(local_path, mode="w", consolidated=True)
+        forecasts.chunk(ZARR_CHUNKS).to_zarr(local_path, mode="w", consolidated=True)
     return forecasts
 
 
@@ -255,7 +250,9 @@ def read_observations(area, local_path):
         )
         logging.info("Reading of observations from HDC STAC...")
         observations = persist_with_progress_bar(observations)
-        observations.to_zarr(local_path, mode="w", consolidated=True)
+        observations.chunk(ZARR_CHUNKS).to_zarr(
+            local_path, mode="w", consolidated=True
+        )
     return observations
 
 
@@ -274,11 +271,11 @@ def read_spi_references(path_ref, bc: bool = False, obs: bool = False):
             ]
             df_ind = df_ind.loc[df_ind.year == 2022]
         if obs:
-            df_ind["period"] = np.repeat(ind.split(".")[0].split(" ")[1], len(df_ind))
+            df_ind["period"] = ind.split(".")[0].split(" ")[1]
             offset_year = (sorted(df_ind.variable.values)[0] == "1982") * 1
             df_ind["variable"] = [int(y) - offset_year for y in df_ind.variable.values]
         else:
-            df_ind["period"] = np.repeat(ind.split("/")[-1].split(".")[-2], len(df_ind))
+            df_ind["period"] = ind.split("/")[-1].split(".")[-2]
             df_ind["year"] = [
                 np.int16(e.split("_")[-1]) for e in df_ind.variable.values
             ]
@@ -311,24 +308,24 @@ def read_spi_references(path_ref, bc: bool = False, obs: bool = False):
             "year",
             "period",
         ]
+    # Few distinct periods repeated over every pixel: store as categorical
+    df_ref["period"] = df_ref["period"].astype("category")
     return df_ref
 
 
 def read_probas_references(path_ref_probas, cats):
-    df_ref = pd.DataFrame()
+    list_cat_csv = []
     for cat in cats:
         files_ref_index = glob.glob(f"{path_ref_probas}{cat}/*")
         list_index_csv = []
         for ind in files_ref_index:
             df_ind = pd.read_csv(ind).melt(id_vars=["V1", "V2"])
-            df_ind["period"] = np.repeat(
-                ind.split("/")[-1].split(".")[-2].split("_")[0], len(df_ind)
-            )
-            df_ind["category"] = np.repeat(PORTUGUESE_CATEGORIES[cat], len(df_ind))
+            df_ind["period"] = ind.split("/")[-1].split(".")[-2].split("_")[0]
+            df_ind["category"] = PORTUGUESE_CATEGORIES[cat]
             df_ind = df_ind.dropna()
             list_index_csv.append(df_ind)
-        df_ref_cat = pd.concat(list_index_csv)
-        df_ref = pd.concat([df_ref, df_ref_cat])
+        list_cat_csv.append(pd.concat(list_index_csv))
+    df_ref = pd.concat(list_cat_csv)
     df_ref.columns = [
         "longitude",
         "latitude",
@@ -338,4 +335,6 @@ def read_probas_references(path_ref_probas, cats):
         "category",
     ]
     df_ref = df_ref[df_ref.year == "2022"].drop("year", axis=1)
+    # Few distinct periods / categories repeated over every pixel: store as categorical
+    df_ref[["period", "category"]] = df_ref[["period", "category"]].astype("category")
     return df_ref
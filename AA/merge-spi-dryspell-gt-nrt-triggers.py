@@ -53,11 +53,11 @@ if os.path.exists(
     trigs_gt["vulnerability"] = "GT"
 
     # Keep SPI by default and DRYSPELL when not available for GT
-    gt_merged = pd.concat(
-        [
-            wcd.sort_values("index", ascending=False).head(4)
-            for (d, c, w), wcd in trigs_gt.groupby(["district", "category", "window"])
-        ]
+    gt_merged = (
+        trigs_gt.sort_values("index", ascending=False, kind="stable")
+        .groupby(["district", "category", "window"])
+        .head(4)
+        .sort_values(["district", "category", "window"], kind="stable")
     )
 
     # Save GT
@@ -83,11 +83,11 @@ if os.path.exists(
     trigs_nrt["vulnerability"] = "NRT"
 
     # Keep SPI by default and DRYSPELL when not available for NRT
-    nrt_merged = pd.concat(
-        [
-            wcd.sort_values("index", ascending=False).head(4)
-            for (d, c, w), wcd in trigs_nrt.groupby(["district", "category", "window"])
-        ]
+    nrt_merged = (
+        trigs_nrt.sort_values("index", ascending=False, kind="stable")
+        .groupby(["district", "category", "window"])
+        .head(4)
+        .sort_values(["district", "category", "window"], kind="stable")
     )
 
     # Save NRT
@@ -116,7 +116,7 @@ if os.path.exists(
     )
 
 # Filter vulnerability based on district: merge GT and NRT
-triggers_full = pd.DataFrame()
+triggers_list = []
 for d, v in params.districts_vulnerability.items():
     if v == "GT":
         if params.iso == "zwe":
@@ -125,7 +125,7 @@ for d, v in params.districts_vulnerability.items():
             ]
         else:
             tmp = gt_merged.loc[gt_merged.district == d]
-        triggers_full = pd.concat([triggers_full, tmp])
+        triggers_list.append(tmp)
     else:
         if params.iso == "zwe":
             tmp = nrt_merged.loc[
@@ -133,7 +133,8 @@ for d, v in params.districts_vulnerability.items():
             ]
         else:
             tmp = nrt_merged.loc[nrt_merged.district == d]
-        triggers_full = pd.concat([triggers_full, tmp])
+        triggers_list.append(tmp)
+triggers_full = pd.concat(triggers_list)
 # -
 
 triggers_full.head()
@@ -15,6 +15,8 @@ warnings.simplefilter(action="ignore", category=FutureWarning)
 
 import datetime
 import traceback
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 import dask
 import pandas as pd
@@ -96,19 +98,22 @@ def run(country, issue, index):
         params.max_index_period,
     )
 
-    # Compute probabilities for each accumulation period
-    probs_merged_dataframes = [
-        run_full_index_pipeline(
-            forecasts,
-            observations,
-            params,
-            triggers_df,
-            gdf,
-            period_name,
-            period_months,
+    # Compute probabilities for each accumulation period (independent, run concurrently)
+    with ThreadPoolExecutor(max_workers=params.max_period_workers) as executor:
+        probs_merged_dataframes = list(
+            executor.map(
+                partial(
+                    run_full_index_pipeline,
+                    forecasts,
+                    observations,
+                    params,
+                    triggers_df,
+                    gdf,
+                ),
+                accumulation_periods.keys(),
+                accumulation_periods.values(),
+            )
         )
-        for period_name, period_months in accumulation_periods.items()
-    ]
     logging.info(f"Completed analysis for the required indexes over {country} country")
 
     probs_df, merged_df = zip(*probs_merged_dataframes)
@@ -119,11 +124,13 @@ def run(country, issue, index):
         index=False,
     )
 
-    merged_db = pd.concat(merged_df).sort_values(["prob_ready", "prob_set"])
-    merged_db = merged_db.drop_duplicates(
-        merged_db.columns.difference(["prob_ready", "prob_set"]), keep="first"
-    )
-    merged_db.sort_values(["district", "index", "category"]).to_csv(
+    # Single sort: output order first, then probabilities so filled ones are kept
+    merged_db = pd.concat(merged_df, ignore_index=True)
+    keys = ["district", "index", "category"]
+    keys += merged_db.columns.difference(keys + ["prob_ready", "prob_set"]).tolist()
+    merged_db = merged_db.sort_values(keys + ["prob_ready", "prob_set"])
+    merged_db = merged_db.drop_duplicates(keys, keep="first")
+    merged_db.to_csv(
         f"{params.data_path}/data/{params.iso}/probs/aa_probabilities_triggers_pilots.csv",
         index=False,
     )
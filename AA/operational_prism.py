@@ -159,11 +159,12 @@ probs_df, merged_df = zip(*probs_merged_dataframes)
 
 probs_dashboard = pd.concat(probs_df).drop_duplicates()
 
-merged_db = pd.concat(merged_df).sort_values(["prob_ready", "prob_set"])
-merged_db = merged_db.drop_duplicates(
-    merged_db.columns.difference(["prob_ready", "prob_set"]), keep="first"
-)
-merged_db = merged_db.sort_values(["district", "index", "category"])
+# Single sort: output order first, then probabilities so filled ones are kept
+merged_db = pd.concat(merged_df, ignore_index=True)
+keys = ["district", "index", "category"]
+keys += merged_db.columns.difference(keys + ["prob_ready", "prob_set"]).tolist()
+merged_db = merged_db.sort_values(keys + ["prob_ready", "prob_set"])
+merged_db = merged_db.drop_duplicates(keys, keep="first")
 merged_db
 # -
 
@@ -177,7 +178,7 @@ probs_dashboard.to_csv(
 )
 
 # Save probabilities merged with triggers
-merged_db.sort_values(["district", "index", "category"]).to_csv(
+merged_db.to_csv(
     f"{params.data_path}/data/{params.iso}/probs/aa_probabilities_triggers_pilots.csv",
     index=False,
 )
@@ -203,11 +204,16 @@ triggers_df = pd.read_csv(
     f"{params.data_path}/data/{params.iso}/probs/aa_probabilities_triggers_pilots_GT.csv",
 )
 
+# Only the merge keys and probabilities are needed from the probabilities files
+probs_columns = ["index", "category", "district", "prob"]
+
 spi_9 = pd.read_csv(
     f"{params.data_path}/data/{params.iso}/probs/aa_probabilities_spi_9.csv",
+    usecols=probs_columns,
 )
 dryspell_9 = pd.read_csv(
     f"{params.data_path}/data/{params.iso}/probs/aa_probabilities_dryspell_9.csv",
+    usecols=probs_columns,
 )
 
 # +
@@ -221,23 +227,18 @@ def merge_probabilities_triggers_dashboard(probs_df, issue, triggers):
         triggers_merged["prob_ready"] = np.nan
         triggers_merged["prob_set"] = np.nan
     
-    # Fill in probabilities columns matching with triggers
-    for l, row in triggers_merged.iterrows():
-        try:
-            if (row.issue_ready == issue):
-                triggers_merged.loc[l, "prob_ready"] = probs_df.loc[
-                    (probs_df["index"] == row["index"])
-                    & (probs_df["category"] == row.category)
-                    & (probs_df["district"] == row.district)
-                ].prob.values[0]
-            elif (row.issue_set == issue):
-                triggers_merged.loc[l, "prob_set"] = probs_df.loc[
-                    (probs_df["index"] == row["index"])
-                    & (probs_df["category"] == row.category)
-                    & (probs_df["district"] == row.district)
-                ].prob.values[0]
-        except:
-            continue
+    # Fill in probabilities columns matching with triggers (keep previous value if no match)
+    keys = ["index", "category", "district"]
+    probs_keys = probs_df[keys + ["prob"]].drop_duplicates(keys)
+    ready = triggers_merged.issue_ready == issue
+    set_ = (triggers_merged.issue_set == issue) & ~ready
+    for mask, col in [(ready, "prob_ready"), (set_, "prob_set")]:
+        matched = triggers_merged.loc[mask, keys].merge(
+            probs_keys, on=keys, how="left", indicator=True
+        )
+        triggers_merged.loc[mask, col] = np.where(
+            matched["_merge"] == "both", matched.prob, triggers_merged.loc[mask, col]
+        )
 
     return triggers_merged
 
@@ -10,6 +10,7 @@ warnings.simplefilter(action="ignore")
 
 import glob
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 import pandas as pd
@@ -146,23 +147,19 @@ def run_triggers_selection(params, vulnerability):
     trigs_df = trigs_df.query("HR < 0")  # remove row when trigger not found (penalty)
 
     # Add window information depending on district
+    provinces = gdf.drop_duplicates("Name").set_index("Name").adm1_name
     trigs_df["Window"] = [
-        get_window_district(gdf, row["index"].split(" ")[-1], row.district, params)
-        for _, row in trigs_df.iterrows()
+        get_window_district(provinces, index.split(" ")[-1], district, params)
+        for index, district in zip(trigs_df["index"], trigs_df.district)
     ]
 
     # Filter per lead time
-    df_leadtime = pd.concat(
-        [
-            g.sort_values(["index", "issue"]).sort_values("HR", kind="stable").head(2)
-            for _, g in trigs_df.dropna()
-            .sort_values("HR")
-            .groupby(
-                ["category", "district", "Window", "lead_time"],
-                as_index=False,
-                sort=False,
-            )
-        ]
+    df_leadtime = (
+        trigs_df.dropna()
+        .sort_values(["index", "issue"])
+        .sort_values("HR", kind="stable")
+        .groupby(["category", "district", "Window", "lead_time"], sort=False)
+        .head(2)
     )
 
     # Keep 4 pairs of triggers per window of activation
@@ -188,29 +185,6 @@ def run_triggers_selection(params, vulnerability):
     )
 
 
-@jit(nopython=True, cache=True)
-def _compute_confusion_matrix(true, pred):
-    # TODO move to hip-analysis
-    """
-    Computes a confusion matrix using numpy for two np.arrays
-    true and pred.
-
-    Results are identical (and similar in computation time) to:
-    "from sklearn.metrics import confusion_matrix"
-
-    However, this function avoids the dependency on sklearn and
-    allows to use numba in nopython mode.
-    """
-
-    K = 2  # len(np.unique(true)) # Number of classes
-    result = np.zeros((K, K))
-
-    for i in range(len(true)):
-        result[true[i]][pred[i]] += 1
-
-    return result
-
-
 @jit(
     nopython=True,
     cache=True,
@@ -242,12 +216,15 @@ def objective(
         prob_issue0 = prob_issue0[:-1]
         prob_issue1 = prob_issue1[:-1]
 
-    prediction = np.logical_and(prob_issue0 > t[0], prob_issue1 > t[1]).astype(np.int16)
-
-    cm = _compute_confusion_matrix(obs_bool.astype(np.int16), prediction)
-    _, false, fn, hits = cm.astype(np.int16).ravel()
+    prediction = np.logical_and(prob_issue0 > t[0], prob_issue1 > t[1])
 
+    # Contingency counts from boolean reductions (no per-year confusion matrix loop)
+    # Comparison rather than a cast so that missing years (NaN) are not observed events
+    observed = obs_bool > 0
     number_actions = np.sum(prediction)
+    hits = np.sum(observed & prediction)
+    false = number_actions - hits
+    fn = np.sum(observed) - hits
 
     if hits + false == 0:  # avoid divisions by zero
         return [penalty, penalty] if sorting else [penalty]
@@ -342,10 +319,11 @@ def brute_numba(func, ranges, args=()):
     inpt_shape = np.array(grid.shape)
     grid = np.reshape(grid, (inpt_shape[0], np.prod(inpt_shape[1:]))).T
 
-    # iterate over input arrays and evaluate func (1D array)
-    Jout = np.array(
-        [func(np.asarray(candidate).flatten(), *args)[0] for candidate in grid]
-    )
+    # iterate over input arrays and evaluate func into a preallocated 1D array
+    candidates = np.ascontiguousarray(grid)
+    Jout = np.empty(candidates.shape[0])
+    for i in range(candidates.shape[0]):
+        Jout[i] = func(candidates[i], *args)[0]
 
     # identify index of minimizer in 1D array
     indx = np.argmin(Jout)
@@ -446,16 +424,20 @@ def filter_triggers_by_window(
         for (ind, iss), sub_tdf in tdf.groupby(["index", "issue"]):
             t = sub_tdf.sort_values("trigger").trigger_value.values
             issue = sub_tdf.issue.unique()
+            # Select each dataset once per pair and reuse the slices below
+            obs_sel = sel_row(obs, tdf, ind)
+            prob_ready_sel = sel_row(probs_ready.prob, tdf, ind, issue)
+            prob_set_sel = sel_row(probs_set.prob, tdf, ind, issue)
             stats = tuple(
                 objective(
                     t,
-                    sel_row(obs.val, tdf, ind).values[0],
-                    sel_row(obs.bool, tdf, ind).values[0][0],
-                    sel_row(probs_ready.prob, tdf, ind, issue).values[0][0][0],
-                    sel_row(probs_set.prob, tdf, ind, issue).values[0][0][0],
-                    sel_row(obs, tdf, ind).lead_time.values,
-                    sel_row(probs_ready.prob, tdf, ind, issue).issue.values[0],
-                    str(sel_row(obs.bool, tdf, ind).category.values[0]),
+                    obs_sel.val.values[0],
+                    obs_sel.bool.values[0][0],
+                    prob_ready_sel.values[0][0][0],
+                    prob_set_sel.values[0][0][0],
+                    obs_sel.lead_time.values,
+                    prob_ready_sel.issue.values[0],
+                    str(obs_sel.bool.category.values[0]),
                     vulnerability,
                     params.tolerance,
                     params.general_t,
@@ -464,8 +446,9 @@ def filter_triggers_by_window(
                 )
             )
             hr, fr = stats[0], stats[1]
-            tdf.loc[(tdf["index"] == ind) & (tdf.issue == iss), "HR"] = hr
-            tdf.loc[(tdf["index"] == ind) & (tdf.issue == iss), "FR"] = fr
+            pair = (tdf["index"] == ind) & (tdf.issue == iss)
+            tdf.loc[pair, "HR"] = hr
+            tdf.loc[pair, "FR"] = fr
         if len(tdf) < (2 * n_to_keep):  # more than two pairs otherwise no need
             return tdf
         else:
@@ -485,8 +468,8 @@ def filter_triggers_by_window(
     return pd.concat(triggers_window_list)
 
 
-def get_window_district(shp, indicator, district, params):
-    province = shp.loc[shp.Name == district].adm1_name.unique()[0]
+def get_window_district(provinces, indicator, district, params):
+    province = provinces[district]
 
     # Get window1 and window2 definitions
     window1 = params.get_windows("window1")
@@ -518,6 +501,7 @@ def read_aggregated_obs(path_to_zarr, params):
         preprocess=lambda ds: ds["band"],
         combine="nested",
         concat_dim="index",
+        parallel=True,
     )
     obs_bool = concat_obs_levels(obs_val, levels=params.intensity_thresholds)
 
@@ -529,15 +513,14 @@ def read_aggregated_obs(path_to_zarr, params):
 
 def read_aggregated_probs(path_to_zarr, params):
     list_issue_paths = sorted(glob.glob(f"{path_to_zarr}/*"))[:-1]  # Last one is the `obs` folder.
-    list_index = {}
-    for l in list_issue_paths:
+
+    def read_issue_probs(l):
+        list_index_paths = glob.glob(f"{l}/{params.index} *")
         list_index_raw = [
-            os.path.join(i, "probabilities.zarr")
-            for i in glob.glob(f"{l}/{params.index} *")
+            os.path.join(i, "probabilities.zarr") for i in list_index_paths
         ]
         list_index_bc = [
-            os.path.join(i, "probabilities_bc.zarr")
-            for i in glob.glob(f"{l}/{params.index} *")
+            os.path.join(i, "probabilities_bc.zarr") for i in list_index_paths
         ]
         index_names = [os.path.split(os.path.dirname(i))[-1] for i in list_index_raw]
 
@@ -548,6 +531,7 @@ def read_aggregated_probs(path_to_zarr, params):
                 preprocess=lambda ds: ds["tp"],
                 combine="nested",
                 concat_dim="index",
+                parallel=True,
             )
             index_bc = xr.open_mfdataset(
                 list_index_bc,
@@ -555,13 +539,24 @@ def read_aggregated_probs(path_to_zarr, params):
                 preprocess=lambda ds: ds["scen"],
                 combine="nested",
                 concat_dim="index",
+                parallel=True,
             )
-
-            ds_index = xr.Dataset({"raw": index_raw, "bc": index_bc})
-            ds_index["index"] = index_names
-            list_index[int(os.path.split(l)[-1])] = ds_index
         except:
-            continue
+            return None
+
+        ds_index = xr.Dataset({"raw": index_raw, "bc": index_bc})
+        ds_index["index"] = index_names
+        return ds_index
+
+    # Open issue months concurrently: reading zarr metadata is I/O bound
+    with ThreadPoolExecutor() as executor:
+        issues_probs = list(executor.map(read_issue_probs, list_issue_paths))
+
+    list_index = {
+        int(os.path.split(l)[-1]): ds_index
+        for l, ds_index in zip(list_issue_paths, issues_probs)
+        if ds_index is not None
+    }
 
     return xr.concat(list_index.values(), dim=pd.Index(list_index.keys(), name="issue"))
 
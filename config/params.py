@@ -89,6 +89,8 @@ class Params:
         skill requirements for Non Regret Triggers in terms of Hit Rate, Success Rate, Failure Rate, Return Period
     windows: dict
         dictionary containing two dictionaries (window1, window2) containing indicators for each window (by province or not)
+    max_period_workers: int
+        maximum number of accumulation periods processed concurrently by the operational script (bounds peak memory)
     """
 
     iso: str
@@ -115,6 +117,7 @@ class Params:
     general_t: dict = field(init=False)
     non_regret_t: dict = field(init=False)
     windows: dict = field(init=False)
+    max_period_workers: int = 2
 
     def __post_init__(self):
         self.iso = self.iso.lower()
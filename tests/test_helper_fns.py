@@ -0,0 +1,125 @@
+# ---
+# jupyter:
+#   jupytext:
+#     formats: ipynb,py:light
+#     text_representation:
+#       extension: .py
+#       format_name: light
+#       format_version: '1.5'
+#       jupytext_version: 1.15.2
+#   kernelspec:
+#     display_name: Python 3 (ipykernel)
+#     language: python
+#     name: python3
+# ---
+
+# %cd ..
+
+# +
+import geopandas as gpd
+import numpy as np
+import rioxarray
+import xarray as xr
+import pandas as pd
+from shapely.geometry import box
+
+from AA.helper_fns import aggregate_by_district, merge_probabilities_triggers_dashboard
+from config.params import Params
+# -
+
+
+# Test functions for ```merge_probabilities_triggers_dashboard```
+
+params = Params(iso='MOZ', index='SPI')
+params.issue = 1
+
+# +
+def test_merge_probabilities_triggers_dashboard():
+    probs = xr.Dataset(
+        data_vars=dict(prob=(["index", "category", "district"], np.array([[[0.25, 0.6, np.nan]]]))),
+        coords=dict(
+            index=["SPI ON"],
+            category=["Moderate"],
+            district=["Chibuto", "Guija", "Massingir"],
+            spatial_ref=0,
+        ),
+    )
+    triggers = pd.DataFrame(
+        dict(
+            district=["Chibuto", "Guija", "Mabalane", "Massingir"],
+            index=["SPI ON", "SPI ON", "SPI ON", "SPI ON"],
+            category=["Moderate", "Moderate", "Moderate", "Moderate"],
+            issue_ready=[1, 12, 1, 1],
+            issue_set=[2, 1, 2, 2],
+            prob_ready=[np.nan, np.nan, 0.5, 0.9],
+            prob_set=[np.nan, np.nan, np.nan, np.nan],
+        )
+    )
+
+    _, merged = merge_probabilities_triggers_dashboard(probs, triggers, params, "ON")
+
+    # Ready row matching issue 1, set row matching issue 1, then previous values
+    # overwritten with NaN when unmatched (Mabalane) or matched with a NaN prob (Massingir)
+    np.testing.assert_equal(
+        merged.prob_ready.values, np.array([0.25, np.nan, np.nan, np.nan])
+    )
+    np.testing.assert_equal(
+        merged.prob_set.values, np.array([np.nan, 0.6, np.nan, np.nan])
+    )
+
+    print("\nMERGE PROBABILITIES TRIGGERS TESTS PASSED")
+
+test_merge_probabilities_triggers_dashboard()
+# -
+
+
+# Test functions for ```aggregate_by_district```
+
+# +
+def test_aggregate_by_district():
+    np.random.seed(42)
+    ds = xr.DataArray(
+        np.random.rand(2, 4, 4),
+        dims=["time", "latitude", "longitude"],
+        coords=dict(
+            time=pd.date_range("2020-01-01", periods=2),
+            latitude=[1.5, 0.5, -0.5, -1.5],
+            longitude=[-1.5, -0.5, 0.5, 1.5],
+        ),
+    )
+    # Tinyland lies between pixel centres and must be dropped
+    gdf = gpd.GeoDataFrame(
+        dict(
+            Name=["Westland", "Eastland", "Tinyland"],
+            geometry=[box(-2, -2, 0, 0), box(0, -2, 2, 2), box(-1.9, 0.1, -1.6, 0.4)],
+        )
+    )
+
+    result = aggregate_by_district(ds, gdf, params)
+
+    # Reference: previous per-district rio.clip implementation
+    PROJ = "+proj=longlat +ellps=clrk66 +towgs84=-80,-100,-228,0,0,0,0 +no_defs"
+    list_districts = {}
+    for _, row in gdf.iterrows():
+        try:
+            list_districts[row["Name"]] = (
+                ds.rio.write_crs(PROJ)
+                .rio.clip(gpd.GeoSeries(row.geometry))
+                .mean(dim=["latitude", "longitude"])
+            )
+        except:
+            continue
+    reference = xr.concat(
+        list_districts.values(), pd.Index(list_districts.keys(), name="district")
+    )
+    reference["district"] = reference.district.astype(str)
+
+    np.testing.assert_equal(result.district.values, np.array(["Westland", "Eastland"]))
+    assert result.dims == reference.dims
+    assert "spatial_ref" in result.coords
+    xr.testing.assert_allclose(result.drop_vars("spatial_ref"), reference.drop_vars("spatial_ref"))
+
+    print("\nAGGREGATE BY DISTRICT TESTS PASSED")
+
+test_aggregate_by_district()
+# -
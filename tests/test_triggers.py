@@ -57,3 +57,28 @@ test_find_optimal_triggers_chibuto()
 # -
 
 
+
+
+# +
+def test_find_optimal_triggers_missing_observation():
+    from config.params import Params
+
+    params = Params(iso='MOZ', index='SPI')
+    obs_bool = np.array([0,0,1,0,0,0,0,0,0,1,0,0,0,0,0,1,0,0,0,0,0,0,0,1,0,0,0,0,0,0])
+    obs_val = np.array([0,-0.42752841,-1.14785480,1.00835359,1.01152670,0.08140295,1.07925391,2.89334059,0.49650693,-2.10596442,-0.11560103,1.13604414,-0.61310524,0.99173242,-0.80315828,-1.33247614,-0.39426482,-0.69886303,0.70436287,-0.68371397,1.43038058,0.55627447,-0.60290152,-0.89140522,1.09524286,0.35090649,0.65150774,0.17972234,1.73618770,-0.32053682])
+    prob_ready = np.array([0.19403316,0.40413737,0.03950670,0.19867207,0.36617446,0.12769049,0.09033364,0.08100221,0.28882408,0.27224869,0.30656403,0.19762351,0.14381145,0.25782165,0.13781390,0.07984945,0.29496825,0.10694549,0.18244502,0.19856039,0.22373931,0.27777267,0.51857853,0.08000000,0.19938798,0.26805690,0.36049867,0.27718082,0.19917504,0])
+    prob_set = np.array([0.14940780,0.32687554,0.10491829,0.17928207,0.28445852,0.01592254,0.10268304,0.23625106,0.21073855,0.38182610,0.11036947,0.18485942,0.07852152,0.30479109,0.14028412,0.27518070,0.33471456,0.07077074,0.31999999,0.0986679,0.16447723,0.27975520,0.15368882,0.15867205,0.22455618,0.37894413,0.37922379,0.17322889,0.15639387,0])
+
+    # A missing (NaN) year must count as not observed, like a 0
+    obs_bool_nan = obs_bool.astype(np.float64)
+    obs_bool_nan[1] = np.nan
+
+    args = (obs_val, prob_ready, prob_set, 1, 10, 'Moderate', 'NRT', params)
+    result, score = find_optimal_triggers(obs_bool, *args)
+    result_nan, score_nan = find_optimal_triggers(obs_bool_nan, *args)
+
+    np.testing.assert_equal(result_nan, result)
+    return np.testing.assert_equal(score_nan, score)
+
+test_find_optimal_triggers_missing_observation()
+# -